@@ -1,22 +1,148 @@
+import argparse
 import subprocess
 import sys
+import sysconfig
 import importlib
+import contextlib
+import ctypes
+import errno
+import functools
 import time
-from datetime import datetime
-import platform
+from concurrent.futures import ThreadPoolExecutor
 import logging
-import requests
+import os
+import re
+import shutil
+import signal
+import select
+import socket
+import struct
 
-# Configure logging to output to both console and file
+LOG_FILE = "network_monitor_v2.log"
+LOG_BUFFER_SIZE = 64 * 1024
+LOG_FLUSH_RECORDS = 10
+LOG_FLUSH_INTERVAL = 60
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that keeps a large write buffer and flushes it every `flush_records`
+    records or `flush_interval` seconds (or immediately for warnings and errors)
+    instead of after every record.
+    """
+
+    def __init__(self, filename: str, flush_records: int = LOG_FLUSH_RECORDS,
+                 flush_interval: float = LOG_FLUSH_INTERVAL, encoding: str = None, delay: bool = False):
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self._pending = 0
+        self._last_flush = time.time()
+        super().__init__(filename, encoding=encoding, delay=delay)
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+                    encoding=self.encoding, errors=self.errors)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            self._pending += 1
+            if (self._pending >= self.flush_records
+                    or record.created - self._last_flush >= self.flush_interval
+                    or record.levelno >= logging.WARNING):
+                self.flush()
+                self._pending = 0
+                self._last_flush = record.created
+        except Exception:
+            self.handleError(record)
+
+# Configure logging to output to both console and file; logging.shutdown() flushes the file at exit
+# (including on SIGTERM, which main() turns into SystemExit)
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s | %(levelname)s | %(message)s",
     handlers=[
-        logging.FileHandler("network_monitor_v2.log", encoding="utf-8"),
+        BufferedFileHandler(LOG_FILE, encoding="utf-8", delay=True),
         logging.StreamHandler(sys.stdout)
     ]
 )
 
+PING_HOST = "google.com"
+PING_TIMEOUT = 1.0
+
+# AF_LINK is the BSD/macOS link-layer address family (not exposed by the socket module everywhere)
+_AF_LINK = getattr(socket, 'AF_LINK', 18)
+# Routing flags shared by /proc/net/route (Linux) and PF_ROUTE messages (BSD/macOS)
+_RTF_UP = 0x0001
+_RTF_GATEWAY = 0x0002
+
+# PF_ROUTE (BSD/macOS) routing socket message layout, see <net/route.h>
+_AF_ROUTE = getattr(socket, 'AF_ROUTE', 17)
+_RTM_VERSION = 5
+_RTM_GET = 0x4
+_RTA_DST = 0x1
+_RTA_NETMASK = 0x4
+_RTA_IFP = 0x10
+_RT_MSGHDR = struct.Struct("=HBBH2xiiiiiiI56x")  # rt_msghdr, including the 56-byte rt_metrics
+_SOCKADDR_IN_ANY = struct.pack("=BBH4s8x", 16, socket.AF_INET, 0, b"\x00" * 4)
+# Empty sockaddr_dl for RTA_IFP; the kernel only reports rtm_index when the request asks for it
+_SOCKADDR_DL_EMPTY = struct.pack("=BB18x", 20, _AF_LINK)
+# Matches the latency in any ping output locale ("time=12.3 ms", "time<1ms", "时间=12ms"),
+# keyed on the "=<" separator and the "ms" unit rather than the localized label
+_PING_RE = re.compile(rb'[=<]\s*(\d+(?:\.\d+)?)\s*ms', re.IGNORECASE)
+# Matches the "interface: en0" line of `route -n get default`
+_IFACE_RE = re.compile(rb'^\s*interface:\s*(\S+)', re.MULTILINE)
+_TS_FMT = '%Y-%m-%d %H:%M:%S'
+_FIELDS = ('Network', 'Device Name', 'MAC Address', 'IP', 'Status')
+_FIELD_PREFIXES = tuple(f"{field}: " for field in _FIELDS)
+
+MONITOR_INTERVAL = 30
+NETWORK_INFO_TTL = 300
+PUBLIC_IP_TTL = 300
+DNS_CACHE_TTL = 300
+
+# requests is imported, and the shared session created, by _get_session() on first use so
+# that `--bootstrap` can install it before anything needs it
+requests = None
+_SESSION = None
+
+_ICMP_ECHO_REQUEST = 8
+_ICMP_ECHO_REPLY = 0
+_ICMP_HEADER = struct.Struct("!BBHHH")
+_ICMP_IDENTIFIER = os.getpid() & 0xFFFF
+_ICMP_PAYLOAD = b"AutoNetMon" * 4
+_ICMP_RECV_SIZE = 1024
+
+_icmp_socket = None
+_icmp_unavailable = False
+_icmp_sequence = 0
+
+_public_ip = None
+_public_ip_time = 0.0
+
+# Maps hostname -> (IPv4 address, time.monotonic() at lookup)
+_dns_cache: dict[str, tuple[str, float]] = {}
+
+# Maps device name -> MAC address
+_MAC_CACHE: dict[str, str] = {}
+
+# Maps interface name -> (network info, time.monotonic() at lookup)
+_network_info_cache: dict[str, tuple[dict, float]] = {}
+
+def is_externally_managed() -> bool:
+    """
+    Check whether the interpreter's environment is marked as externally managed (PEP 668),
+    in which case pip refuses to install into it.
+    
+    Returns:
+        bool: True if pip installs into this environment would be rejected.
+    """
+    # The marker does not apply inside a virtual environment
+    if sys.prefix != sys.base_prefix:
+        return False
+    return os.path.isfile(os.path.join(sysconfig.get_path("stdlib"), "EXTERNALLY-MANAGED"))
+
 def install_package(package_name: str) -> bool:
     """
     Install a Python package using pip.
@@ -27,6 +153,12 @@ def install_package(package_name: str) -> bool:
     Returns:
         bool: True if installation succeeded; False otherwise.
     """
+    if is_externally_managed():
+        logging.error(
+            f"Not installing {package_name}: this Python environment is externally managed (PEP 668). "
+            "Use a virtual environment or the system package manager."
+        )
+        return False
     try:
         subprocess.check_call([sys.executable, "-m", "pip", "install", package_name])
         return True
@@ -41,103 +173,289 @@ def ensure_packages(package_requirements: list[tuple[str, str]]) -> None:
     Args:
         package_requirements (list[tuple[str, str]]): List of tuples in the form (pip package name, import module name).
     """
+    # Frozen (PyInstaller/Nuitka) builds bundle their dependencies and have no pip to call
+    if getattr(sys, 'frozen', False):
+        return
     for pip_name, import_name in package_requirements:
+        if import_name in sys.modules:
+            logging.info(f"{pip_name} is already installed.")
+            continue
         try:
             importlib.import_module(import_name)
             logging.info(f"{pip_name} is already installed.")
         except ImportError:
             logging.info(f"Installing {pip_name}...")
             if install_package(pip_name):
+                # Let the import system notice the newly installed package
+                importlib.invalidate_caches()
                 logging.info(f"Successfully installed {pip_name}.")
             else:
                 logging.error(f"Failed to install {pip_name}. Please install it manually.")
                 sys.exit(1)
 
+def _get_session():
+    """
+    Import requests and create the shared keep-alive session on first use.
+    
+    Returns:
+        requests.Session: The shared session.
+    """
+    global requests, _SESSION
+    if _SESSION is None:
+        requests = importlib.import_module("requests")
+        session = requests.Session()
+        session.headers['User-Agent'] = 'autonetmon'
+        _SESSION = session
+    return _SESSION
+
 def get_public_ip() -> str:
     """
     Retrieve the public IP address using the ipify API.
     
+    The address is cached for PUBLIC_IP_TTL seconds, and requests go through a
+    shared keep-alive session so the TLS connection is reused between refreshes.
+    
     Returns:
         str: The public IP address or an error message if retrieval fails.
     """
+    global _public_ip, _public_ip_time
+    now = time.monotonic()
+    if _public_ip is not None and now - _public_ip_time < PUBLIC_IP_TTL:
+        return _public_ip
+    session = _get_session()
     try:
-        response = requests.get('https://api.ipify.org', timeout=10)
+        response = session.get('https://api.ipify.org', timeout=10)
         response.raise_for_status()
-        return response.text
+        _public_ip, _public_ip_time = response.text, now
+        return _public_ip
     except requests.exceptions.RequestException as e:
         logging.error(f"Error retrieving public IP: {e}")
         return "Unable to get IP"
 
+def _icmp_checksum(data: bytes) -> int:
+    """
+    Compute the RFC 1071 internet checksum of an ICMP message.
+    
+    Args:
+        data (bytes): The ICMP header and payload.
+    
+    Returns:
+        int: The 16-bit one's complement checksum.
+    """
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+def _resolve(host: str) -> str:
+    """
+    Resolve a hostname to an IPv4 address, caching the answer for DNS_CACHE_TTL seconds.
+    
+    If a refresh fails, the previous address is reused so a flaky resolver does not
+    turn into a reported outage.
+    
+    Args:
+        host (str): The hostname to resolve.
+    
+    Returns:
+        str: The IPv4 address of the host.
+    """
+    now = time.monotonic()
+    cached = _dns_cache.get(host)
+    if cached is not None and now - cached[1] < DNS_CACHE_TTL:
+        return cached[0]
+    try:
+        address = socket.gethostbyname(host)
+    except OSError as e:
+        if cached is None:
+            raise
+        logging.warning(f"Could not re-resolve {host} ({e}), reusing {cached[0]}.")
+        return cached[0]
+    _dns_cache[host] = (address, now)
+    return address
+
+def _get_icmp_socket():
+    """
+    Open the raw ICMP socket on first use and keep it for the lifetime of the process.
+    
+    Returns:
+        socket.socket: The raw ICMP socket, or None if the process lacks the privileges to open one.
+    """
+    global _icmp_socket, _icmp_unavailable
+    if _icmp_socket is None and not _icmp_unavailable:
+        try:
+            _icmp_socket = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        except OSError as e:
+            logging.info(f"Raw ICMP socket unavailable ({e}), falling back to the system ping command.")
+            _icmp_unavailable = True
+    return _icmp_socket
+
+def _build_echo_request(sequence: int) -> bytes:
+    """
+    Build an ICMP echo request carrying this process's identifier.
+    
+    Args:
+        sequence (int): The 16-bit sequence number.
+    
+    Returns:
+        bytes: The ICMP message, checksum included.
+    """
+    header = _ICMP_HEADER.pack(_ICMP_ECHO_REQUEST, 0, 0, _ICMP_IDENTIFIER, sequence)
+    checksum = _icmp_checksum(header + _ICMP_PAYLOAD)
+    return _ICMP_HEADER.pack(_ICMP_ECHO_REQUEST, 0, checksum, _ICMP_IDENTIFIER, sequence) + _ICMP_PAYLOAD
+
+def _is_echo_reply(data: bytes, source: bytes, sequence: int) -> bool:
+    """
+    Check whether a packet read from the raw socket is the reply to our echo request.
+    
+    A raw ICMP socket sees every ICMP packet on the host, so the source address is
+    checked as well as the identifier and sequence, which another process may share.
+    
+    Args:
+        data (bytes): The IPv4 packet as received.
+        source (bytes): The packed IPv4 address the request was sent to.
+        sequence (int): The sequence number of the request.
+    
+    Returns:
+        bool: True if the packet is the matching echo reply.
+    """
+    # Raw IPv4 sockets deliver the IP header in front of the ICMP message
+    offset = (data[0] & 0x0F) * 4
+    if offset < 20 or len(data) < offset + _ICMP_HEADER.size or data[12:16] != source:
+        return False
+    icmp_type, _, _, identifier, reply_sequence = _ICMP_HEADER.unpack_from(data, offset)
+    return icmp_type == _ICMP_ECHO_REPLY and identifier == _ICMP_IDENTIFIER and reply_sequence == sequence
+
+def _ping_icmp(sock: socket.socket, address: str) -> tuple[bool, float]:
+    """
+    Send a single ICMP echo request over the persistent socket and wait for the matching reply.
+    
+    Args:
+        sock (socket.socket): The raw ICMP socket.
+        address (str): The IPv4 address to ping.
+    
+    Returns:
+        tuple: A tuple containing a boolean for connectivity and a float for latency (in ms).
+    """
+    global _icmp_sequence
+    _icmp_sequence = sequence = (_icmp_sequence + 1) & 0xFFFF
+    packet = _build_echo_request(sequence)
+    source = socket.inet_aton(address)
+
+    # Drop any stale replies left over from a previous, timed-out probe
+    while select.select([sock], [], [], 0)[0]:
+        sock.recv(_ICMP_RECV_SIZE)
+
+    start = time.perf_counter_ns()
+    deadline = time.perf_counter() + PING_TIMEOUT
+    sock.sendto(packet, (address, 0))
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0 or not select.select([sock], [], [], remaining)[0]:
+            return False, 0.0
+        data = sock.recv(_ICMP_RECV_SIZE)
+        received = time.perf_counter_ns()
+        if _is_echo_reply(data, source, sequence):
+            return True, round((received - start) / 1e6, 2)
+
+@functools.lru_cache(maxsize=None)
+def _which(command: str) -> str:
+    """Resolve a command to an absolute path once, keeping the bare name if it is not on PATH."""
+    return shutil.which(command) or command
+
+def _spawn_options(argv: list[str]) -> tuple[list[str], dict]:
+    """
+    Prepare a helper command so subprocess can launch it with posix_spawn instead of fork+exec.
+    
+    subprocess only takes the posix_spawn path for an executable given by path and with
+    close_fds disabled; the latter is safe because Python's own descriptors are non-inheritable.
+    
+    Returns:
+        tuple: The argv with an absolute executable path, and the extra Popen keyword arguments.
+    """
+    return [_which(argv[0])] + argv[1:], {"close_fds": False}
+
+def _spawn_capture(argv: list[str]) -> bytes:
+    """
+    Run a helper command and return its raw stdout, raising CalledProcessError on failure.
+    
+    Args:
+        argv (list[str]): The command line to run.
+    
+    Returns:
+        bytes: The command's standard output.
+    """
+    spawn_argv, options = _spawn_options(argv)
+    return subprocess.check_output(spawn_argv, stderr=subprocess.DEVNULL, **options)
+
+def _ping_subprocess(argv: list[str]) -> tuple[bool, float]:
+    """
+    Ping with the system ping binary, which can send ICMP without extra privileges.
+    
+    Args:
+        argv (list[str]): The platform's ping command line.
+    
+    Returns:
+        tuple: A tuple containing a boolean for connectivity and a float for latency (in ms).
+    """
+    output = _spawn_capture(argv)
+    match = _PING_RE.search(output)
+    return True, float(match.group(1)) if match else 0.0
+
+def _ping_tcp(address: str) -> tuple[bool, float]:
+    """
+    Measure latency as the time taken to open a TCP connection, for processes that cannot open raw sockets.
+    
+    Args:
+        address (str): The IPv4 address to connect to.
+    
+    Returns:
+        tuple: A tuple containing a boolean for connectivity and a float for latency (in ms).
+    """
+    start = time.perf_counter_ns()
+    with socket.create_connection((address, 80), timeout=PING_TIMEOUT):
+        received = time.perf_counter_ns()
+    return True, round((received - start) / 1e6, 2)
+
 def ping_google() -> tuple[bool, float]:
     """
     Ping google.com to verify connectivity and measure latency.
     
+    Uses a persistent raw ICMP socket when available, falls back to the system ping
+    binary otherwise, and to TCP connect latency if no ping binary is installed.
+    
     Returns:
         tuple: A tuple containing a boolean for connectivity and a float for latency (in ms).
     """
-    param = '-n' if platform.system().lower() == 'windows' else '-c'
-    command = ['ping', param, '1', 'google.com']
-    
     try:
-        output = subprocess.check_output(command, stderr=subprocess.STDOUT).decode('utf-8')
-        if platform.system().lower() == 'windows':
-            if 'TTL=' in output:
-                try:
-                    # Extract numeric latency value from output (e.g., 时间=xxms)
-                    time_part = [s for s in output.split() if '时间=' in s or 'time=' in s]
-                    if time_part:
-                        latency = float(''.join(filter(lambda ch: ch.isdigit() or ch == '.', time_part[0])))
-                        return True, latency
-                except Exception as e:
-                    logging.error(f"Error parsing ping latency: {e}")
-        else:
-            if 'time=' in output:
-                try:
-                    time_str = output.split('time=')[-1].split(' ')[0].strip()
-                    return True, float(time_str)
-                except Exception as e:
-                    logging.error(f"Error parsing ping latency: {e}")
-        return True, 0.0
-    except subprocess.CalledProcessError as e:
+        is_connected, latency = _OS_OPS.ping()
+        if not is_connected:
+            logging.error(f"Ping failed: no reply from {PING_HOST} within {PING_TIMEOUT}s")
+        return is_connected, latency
+    except (subprocess.CalledProcessError, OSError) as e:
         logging.error(f"Ping failed: {e}")
         return False, 0.0
 
-def get_active_network_service() -> dict:
+def get_active_network_service(active_interface: str = None) -> dict:
     """
     Retrieve the active network service information.
     
+    Args:
+        active_interface (str): The default interface, if already known; it is looked up otherwise.
+    
     Returns:
         dict: A dictionary containing 'network_name' and 'device_name'. In case of error, an 'error' key is added.
     """
     try:
-        # Obtain the default route's interface (command may vary with the platform)
-        route_output = subprocess.check_output(
-            ["route", "-n", "get", "default"], stderr=subprocess.STDOUT
-        ).decode("utf-8")
-        active_interface = None
-        for line in route_output.splitlines():
-            if "interface:" in line:
-                active_interface = line.split(":")[1].strip()
-                break
+        if active_interface is None:
+            active_interface = _OS_OPS.active_interface()
 
         if not active_interface:
             return {"network_name": "No Active Network", "device_name": None}
 
-        # Retrieve the hardware port information using networksetup
-        networksetup_output = subprocess.check_output(
-            ["/usr/sbin/networksetup", "-listallhardwareports"], stderr=subprocess.STDOUT
-        ).decode("utf-8")
-        current_port = None
-        device_name = None
-
-        for line in networksetup_output.splitlines():
-            if "Hardware Port" in line:
-                current_port = line.split(":")[1].strip()
-            elif "Device" in line and active_interface in line:
-                device_name = line.split(":")[1].strip()
-                return {"network_name": current_port, "device_name": device_name}
-
-        return {"network_name": "Unknown Network", "device_name": None}
+        return _OS_OPS.network_service(active_interface)
     except subprocess.CalledProcessError as e:
         logging.error(f"Error retrieving network service: {e}")
         return {"network_name": "Error", "device_name": None, "error": str(e)}
@@ -145,10 +463,293 @@ def get_active_network_service() -> dict:
         logging.error(f"Unexpected error retrieving network service: {e}")
         return {"network_name": "Error", "device_name": None, "error": str(e)}
 
+class _SockaddrDl(ctypes.Structure):
+    """Fixed-size prefix of the BSD ``struct sockaddr_dl``; ``sdl_data`` follows it."""
+    _fields_ = [
+        ("sdl_len", ctypes.c_ubyte),
+        ("sdl_family", ctypes.c_ubyte),
+        ("sdl_index", ctypes.c_ushort),
+        ("sdl_type", ctypes.c_ubyte),
+        ("sdl_nlen", ctypes.c_ubyte),
+        ("sdl_alen", ctypes.c_ubyte),
+        ("sdl_slen", ctypes.c_ubyte),
+    ]
+
+class _Ifaddrs(ctypes.Structure):
+    """The BSD/macOS ``struct ifaddrs`` list node returned by getifaddrs(3)."""
+
+_Ifaddrs._fields_ = [
+    ("ifa_next", ctypes.POINTER(_Ifaddrs)),
+    ("ifa_name", ctypes.c_char_p),
+    ("ifa_flags", ctypes.c_uint),
+    ("ifa_addr", ctypes.c_void_p),
+    ("ifa_netmask", ctypes.c_void_p),
+    ("ifa_dstaddr", ctypes.c_void_p),
+    ("ifa_data", ctypes.c_void_p),
+]
+
+def _read_mac_sysfs(device_name: str) -> str:
+    """
+    Read the MAC address of a Linux network device from sysfs.
+    
+    Args:
+        device_name (str): The name of the network device.
+    
+    Returns:
+        str: The MAC address if found; otherwise, None.
+    """
+    with open(f"/sys/class/net/{device_name}/address", encoding="ascii") as f:
+        return f.read().strip() or None
+
+def _read_mac_getifaddrs(device_name: str) -> str:
+    """
+    Read the MAC address of a BSD/macOS network device from its AF_LINK entry in getifaddrs(3).
+    
+    Args:
+        device_name (str): The name of the network device.
+    
+    Returns:
+        str: The MAC address if found; otherwise, None.
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    ifap = ctypes.POINTER(_Ifaddrs)()
+    if libc.getifaddrs(ctypes.byref(ifap)) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    try:
+        target = device_name.encode()
+        ifa = ifap
+        while ifa:
+            entry = ifa.contents
+            if entry.ifa_name == target and entry.ifa_addr:
+                sdl = _SockaddrDl.from_address(entry.ifa_addr)
+                if sdl.sdl_family == _AF_LINK and sdl.sdl_alen == 6:
+                    # The link-layer address follows the interface name inside sdl_data
+                    mac = ctypes.string_at(entry.ifa_addr + ctypes.sizeof(_SockaddrDl) + sdl.sdl_nlen, 6)
+                    return ":".join(f"{b:02x}" for b in mac)
+            ifa = entry.ifa_next
+        return None
+    finally:
+        libc.freeifaddrs(ifap)
+
+def _pack_rtm_get_default(seq: int) -> bytes:
+    """
+    Build the PF_ROUTE RTM_GET message asking for the default route (0.0.0.0/0).
+    
+    Args:
+        seq (int): The message sequence number, echoed back in the kernel's reply.
+    
+    Returns:
+        bytes: The rt_msghdr followed by the destination, netmask and interface sockaddrs.
+    """
+    # Destination 0.0.0.0, netmask 0.0.0.0, and an empty link address requesting the interface
+    body = _SOCKADDR_IN_ANY + _SOCKADDR_IN_ANY + _SOCKADDR_DL_EMPTY
+    header = _RT_MSGHDR.pack(
+        _RT_MSGHDR.size + len(body), _RTM_VERSION, _RTM_GET, 0,
+        _RTF_UP | _RTF_GATEWAY, _RTA_DST | _RTA_NETMASK | _RTA_IFP, 0, seq, 0, 0, 0
+    )
+    return header + body
+
+def _read_default_interface_pf_route() -> str:
+    """
+    Ask the BSD/macOS kernel for the default route with an RTM_GET message on a PF_ROUTE socket.
+    
+    Returns:
+        str: The interface name carrying the default route, or None if there is no default route.
+    """
+    seq = 1
+    pid = os.getpid()
+    with socket.socket(_AF_ROUTE, socket.SOCK_RAW, 0) as sock:
+        sock.settimeout(PING_TIMEOUT)
+        try:
+            sock.send(_pack_rtm_get_default(seq))
+        except OSError as e:
+            if e.errno == errno.ESRCH:
+                return None
+            raise
+        # The routing socket also carries unrelated routing messages; wait for our reply
+        while True:
+            reply = sock.recv(2048)
+            if len(reply) < _RT_MSGHDR.size:
+                continue
+            _, version, msg_type, index, _, _, msg_pid, msg_seq, msg_errno, _, _ = _RT_MSGHDR.unpack_from(reply)
+            if version == _RTM_VERSION and msg_type == _RTM_GET and msg_pid == pid and msg_seq == seq:
+                if msg_errno:
+                    raise OSError(msg_errno, os.strerror(msg_errno))
+                if index == 0:
+                    raise OSError(errno.ENXIO, "RTM_GET reply did not include an interface index")
+                return socket.if_indextoname(index)
+
+def _iter_command_lines(argv: list[str]):
+    """
+    Yield a command's output line by line as it is produced, without buffering all of it.
+    
+    If the caller stops early the command is terminated; if it runs to completion with a
+    non-zero exit status, CalledProcessError is raised as with subprocess.check_output.
+    
+    Args:
+        argv (list[str]): The command line to run.
+    """
+    spawn_argv, options = _spawn_options(argv)
+    with subprocess.Popen(
+        spawn_argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, encoding="utf-8", **options
+    ) as proc:
+        finished = False
+        try:
+            yield from proc.stdout
+            finished = True
+        finally:
+            if not finished and proc.poll() is None:
+                proc.terminate()
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, argv)
+
+def _read_mac_ifconfig(device_name: str) -> str:
+    """
+    Read the MAC address of a network device by parsing ifconfig output.
+    
+    Args:
+        device_name (str): The name of the network device.
+    
+    Returns:
+        str: The MAC address if found; otherwise, None.
+    """
+    with contextlib.closing(_iter_command_lines(["/sbin/ifconfig", device_name])) as lines:
+        for line in lines:
+            if "ether" in line:
+                return line.split()[1].strip()
+    return None
+
+class _OsOps:
+    """
+    Network probes for the current platform. A single instance is chosen from
+    sys.platform at import and bound to _OS_OPS, so the monitoring loop never
+    re-detects the OS. This base class holds the generic command-line fallbacks.
+    """
+
+    ping_argv = ['ping', '-c', '1']
+
+    def active_interface(self) -> str:
+        """
+        Retrieve the name of the interface carrying the default route.
+        
+        Returns:
+            str: The interface name (e.g. en0), or None if there is no default route.
+        """
+        match = _IFACE_RE.search(_spawn_capture(["route", "-n", "get", "default"]))
+        return match.group(1).decode() if match else None
+
+    def network_service(self, active_interface: str) -> dict:
+        """
+        Describe the network service behind an interface.
+        
+        Returns:
+            dict: A dictionary containing 'network_name' and 'device_name'.
+        """
+        return {"network_name": "Unknown Network", "device_name": active_interface}
+
+    def mac(self, device_name: str) -> str:
+        """
+        Retrieve the MAC address of a network device.
+        
+        Returns:
+            str: The MAC address if found; otherwise, None.
+        """
+        return _read_mac_ifconfig(device_name)
+
+    def ping(self) -> tuple[bool, float]:
+        """
+        Ping PING_HOST over the persistent raw ICMP socket when available, falling back to
+        the system ping binary otherwise, and to TCP connect latency if it is not installed.
+        
+        Returns:
+            tuple: A tuple containing a boolean for connectivity and a float for latency (in ms).
+        """
+        address = _resolve(PING_HOST)
+        sock = _get_icmp_socket()
+        if sock is None:
+            try:
+                # Pass the cached address so ping does not do its own DNS lookup
+                return _ping_subprocess(self.ping_argv + [address])
+            except FileNotFoundError:
+                return _ping_tcp(address)
+        return _ping_icmp(sock, address)
+
+class _LinuxOps(_OsOps):
+    """Linux probes backed by procfs and sysfs."""
+
+    route_table = "/proc/net/route"
+
+    def active_interface(self) -> str:
+        # Pick the lowest-metric default route that is up
+        best_interface, best_metric = None, None
+        with open(self.route_table, encoding="ascii") as f:
+            next(f)  # Skip the header row
+            for line in f:
+                fields = line.split()
+                if fields[1] != "00000000" or not int(fields[3], 16) & _RTF_UP:
+                    continue
+                metric = int(fields[6])
+                if best_metric is None or metric < best_metric:
+                    best_interface, best_metric = fields[0], metric
+        return best_interface
+
+    def network_service(self, active_interface: str) -> dict:
+        is_wireless = os.path.isdir(f"/sys/class/net/{active_interface}/wireless")
+        return {"network_name": "Wi-Fi" if is_wireless else "Ethernet", "device_name": active_interface}
+
+    def mac(self, device_name: str) -> str:
+        return _read_mac_sysfs(device_name)
+
+class _MacOps(_OsOps):
+    """macOS probes: a PF_ROUTE socket and getifaddrs(3), with route/networksetup as fallbacks."""
+
+    def active_interface(self) -> str:
+        try:
+            return _read_default_interface_pf_route()
+        except OSError as e:
+            logging.debug(f"PF_ROUTE lookup failed ({e}), falling back to the route command.")
+            return super().active_interface()
+
+    def network_service(self, active_interface: str) -> dict:
+        # Retrieve the hardware port information using networksetup, stopping at the first match
+        current_port = None
+        device_name = None
+
+        with contextlib.closing(_iter_command_lines(["/usr/sbin/networksetup", "-listallhardwareports"])) as lines:
+            for line in lines:
+                if "Hardware Port" in line:
+                    current_port = line.split(":")[1].strip()
+                elif "Device" in line and active_interface in line:
+                    device_name = line.split(":")[1].strip()
+                    return {"network_name": current_port, "device_name": device_name}
+
+        return {"network_name": "Unknown Network", "device_name": None}
+
+    def mac(self, device_name: str) -> str:
+        return _read_mac_getifaddrs(device_name)
+
+class _WinOps(_OsOps):
+    """Windows probes; only the ping command line differs from the generic fallbacks."""
+
+    ping_argv = ['ping', '-n', '1']
+
+if sys.platform == 'darwin':
+    _OS_OPS = _MacOps()
+elif sys.platform.startswith('linux'):
+    _OS_OPS = _LinuxOps()
+elif sys.platform == 'win32':
+    _OS_OPS = _WinOps()
+else:
+    _OS_OPS = _OsOps()
+
 def get_mac_address(device_name: str) -> str:
     """
     Retrieve the MAC address for the specified network device.
     
+    Found addresses are cached per device for the lifetime of the process, since a
+    device's hardware address does not change; misses and errors are retried.
+    
     Args:
         device_name (str): The name of the network device.
     
@@ -158,15 +759,13 @@ def get_mac_address(device_name: str) -> str:
     try:
         if not device_name:
             return None
-        # Use ifconfig to obtain the MAC address
-        ifconfig_output = subprocess.check_output(
-            ["/sbin/ifconfig", device_name], stderr=subprocess.STDOUT
-        ).decode("utf-8")
-        
-        for line in ifconfig_output.splitlines():
-            if "ether" in line:
-                return line.split()[1].strip()
-        return None
+        cached = _MAC_CACHE.get(device_name)
+        if cached:
+            return cached
+        mac_address = _OS_OPS.mac(device_name)
+        if mac_address:
+            _MAC_CACHE[device_name] = mac_address
+        return mac_address
     except subprocess.CalledProcessError as e:
         logging.error(f"Error getting MAC address for {device_name}: {e}")
         return None
@@ -178,51 +777,115 @@ def get_active_network_info() -> dict:
     """
     Retrieve active network information including network name, device name, and MAC address.
     
+    Only the default route is looked up on every call; the hardware port and MAC address
+    are cached per interface for NETWORK_INFO_TTL seconds.
+    
     Returns:
         dict: A dictionary containing the network information.
     """
-    network_info = get_active_network_service()
+    try:
+        active_interface = _OS_OPS.active_interface()
+    except Exception as e:
+        logging.error(f"Error retrieving default route: {e}")
+        return {"network_name": "Error", "device_name": None, "mac_address": None}
+
+    if not active_interface:
+        return {"network_name": "No Active Network", "device_name": None, "mac_address": None}
+
+    now = time.monotonic()
+    cached = _network_info_cache.get(active_interface)
+    if cached is not None and now - cached[1] < NETWORK_INFO_TTL:
+        return cached[0]
+
+    network_info = get_active_network_service(active_interface)
     mac_address = get_mac_address(network_info.get('device_name')) if network_info.get('device_name') else None
     
-    return {
+    result = {
         "network_name": network_info.get("network_name"),
         "device_name": network_info.get("device_name"),
         "mac_address": mac_address
     }
+    # Don't pin a failed MAC lookup (None) for the whole TTL; retry it next cycle
+    if "error" not in network_info and (mac_address or not result["device_name"]):
+        _network_info_cache[active_interface] = (result, now)
+    return result
 
-def main() -> None:
+def _handle_sigterm(signum: int, frame) -> None:
+    """
+    Turn SIGTERM (how systemd, docker and kill stop the monitor) into SystemExit so that
+    main()'s cleanup and logging.shutdown() run and the buffered log file is flushed.
+    """
+    raise SystemExit(0)
+
+def main(argv: list[str] = None) -> None:
     """
     Main function that executes network monitoring.
+    
+    Args:
+        argv (list[str]): Command-line arguments; defaults to sys.argv[1:].
     """
-    # Define required packages: (pip package name, import module name)
-    required_packages = [('requests', 'requests')]
-    # Ensure that the required packages are installed
-    ensure_packages(required_packages)
+    parser = argparse.ArgumentParser(description="Monitor public IP, connectivity and the active network interface.")
+    parser.add_argument(
+        "--bootstrap", action="store_true",
+        help="check for missing dependencies and install them with pip before monitoring"
+    )
+    args = parser.parse_args(argv)
+
+    if args.bootstrap:
+        # Define required packages: (pip package name, import module name)
+        required_packages = [('requests', 'requests')]
+        # Ensure that the required packages are installed
+        ensure_packages(required_packages)
+
+    try:
+        _get_session()
+    except ImportError:
+        logging.error("requests is not installed. Run with --bootstrap to install it.")
+        sys.exit(1)
     
+    signal.signal(signal.SIGTERM, _handle_sigterm)
     logging.info("Starting network monitoring...")
     
+    # The three probes are independent and I/O-bound, so run them concurrently
+    pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="probe")
+    # Sleep towards absolute monotonic deadlines so the time spent probing does not make cycles drift
+    next_tick = time.monotonic() + MONITOR_INTERVAL
     try:
         while True:
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            public_ip = get_public_ip()
-            is_connected, latency = ping_google()
-            network_info = get_active_network_info()
-            network_name = network_info.get("network_name")
-            device_name = network_info.get("device_name")
-            mac_address = network_info.get("mac_address")
+            current_time = time.strftime(_TS_FMT, time.localtime())
+            f_ip = pool.submit(get_public_ip)
+            f_ping = pool.submit(ping_google)
+            f_info = pool.submit(get_active_network_info)
+            public_ip = f_ip.result()
+            is_connected, latency = f_ping.result()
+            network_info = f_info.result()
             status = "Connected" if is_connected else "Disconnected"
-            
-            log_entry = (
-                f"{current_time} | Network: {network_name} | Device Name: {device_name} | "
-                f"MAC Address: {mac_address} | IP: {public_ip} | Status: {status}"
+            values = (
+                network_info.get("network_name"), network_info.get("device_name"),
+                network_info.get("mac_address"), public_ip, status
             )
+            
+            parts = [current_time]
+            parts += [prefix + str(value) for prefix, value in zip(_FIELD_PREFIXES, values)]
             if is_connected:
-                log_entry += f" | Latency: {latency}ms"
+                parts.append(f"Latency: {latency}ms")
             
-            logging.info(log_entry)
-            time.sleep(30)
+            logging.info(' | '.join(parts))
+
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                logging.warning(f"Monitoring cycle overran the {MONITOR_INTERVAL}s interval by {-delay:.2f}s")
+                next_tick = time.monotonic() + MONITOR_INTERVAL
+            else:
+                time.sleep(delay)
+                next_tick += MONITOR_INTERVAL
     except KeyboardInterrupt:
         logging.info("Monitoring stopped by user.")
+    except SystemExit:
+        logging.info("Monitoring stopped by SIGTERM.")
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,483 @@
+import pytest
+
+import network_monitor as nm
+
+
+@pytest.mark.parametrize("output, expected", [
+    # Linux iputils
+    (b"64 bytes from 142.250.74.46: icmp_seq=1 ttl=117 time=12.3 ms\n", b"12.3"),
+    # macOS
+    (b"PING google.com (142.250.74.46): 56 data bytes\n"
+     b"64 bytes from 142.250.74.46: icmp_seq=0 ttl=117 time=13.082 ms\n", b"13.082"),
+    # Windows, English locale, sub-millisecond reply
+    (b"Reply from 142.250.74.46: bytes=32 time<1ms TTL=117\r\n", b"1"),
+    # Windows, Chinese locale (GBK console output)
+    ("来自 142.250.74.46 的回复: 字节=32 时间=12ms TTL=117\r\n".encode("gbk"), b"12"),
+])
+def test_ping_re_extracts_latency(output, expected):
+    match = nm._PING_RE.search(output)
+    assert match is not None
+    assert match.group(1) == expected
+
+
+def test_ping_re_ignores_output_without_latency():
+    assert nm._PING_RE.search(b"Request timed out.\r\n") is None
+
+
+def test_icmp_checksum_rfc1071_vector():
+    # Worked example from RFC 1071 section 3: the folded sum is 0xddf2
+    assert nm._icmp_checksum(bytes.fromhex("0001f203f4f5f6f7")) == 0x220D
+
+
+def test_icmp_checksum_pads_odd_length():
+    assert nm._icmp_checksum(b"\x01") == nm._icmp_checksum(b"\x01\x00")
+
+
+def test_echo_request_checksum_verifies():
+    packet = nm._build_echo_request(7)
+    icmp_type, code, _, identifier, sequence = nm._ICMP_HEADER.unpack_from(packet)
+    assert (icmp_type, code, identifier, sequence) == (nm._ICMP_ECHO_REQUEST, 0, nm._ICMP_IDENTIFIER, 7)
+    # Summing a message that includes its own checksum yields zero
+    assert nm._icmp_checksum(packet) == 0
+
+
+def _echo_reply(source, identifier=None, sequence=7, icmp_type=None):
+    ip_header = bytes([0x45]) + bytes(11) + source + bytes(4)
+    icmp = nm._ICMP_HEADER.pack(
+        nm._ICMP_ECHO_REPLY if icmp_type is None else icmp_type, 0, 0,
+        nm._ICMP_IDENTIFIER if identifier is None else identifier, sequence
+    )
+    return ip_header + icmp + nm._ICMP_PAYLOAD
+
+
+def test_is_echo_reply_matches_own_reply():
+    source = bytes([8, 8, 8, 8])
+    assert nm._is_echo_reply(_echo_reply(source), source, 7)
+
+
+@pytest.mark.parametrize("packet", [
+    _echo_reply(bytes([1, 1, 1, 1])),
+    _echo_reply(bytes([8, 8, 8, 8]), identifier=(nm._ICMP_IDENTIFIER + 1) & 0xFFFF),
+    _echo_reply(bytes([8, 8, 8, 8]), sequence=8),
+    _echo_reply(bytes([8, 8, 8, 8]), icmp_type=nm._ICMP_ECHO_REQUEST),
+    bytes([0x45]) + bytes(15),
+])
+def test_is_echo_reply_rejects_other_packets(packet):
+    assert not nm._is_echo_reply(packet, bytes([8, 8, 8, 8]), 7)
+
+
+_ROUTE_HEADER = "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT\n"
+
+
+def _linux_ops(tmp_path, rows):
+    route_table = tmp_path / "route"
+    route_table.write_text(_ROUTE_HEADER + "".join(row + "\n" for row in rows), encoding="ascii")
+    ops = nm._LinuxOps()
+    ops.route_table = str(route_table)
+    return ops
+
+
+def test_linux_active_interface_picks_lowest_metric_default(tmp_path):
+    ops = _linux_ops(tmp_path, [
+        "eth0\t000200C0\t00000000\t0001\t0\t0\t0\t00FFFFFF\t0\t0\t0",
+        "wlan0\t00000000\t0101A8C0\t0003\t0\t0\t600\t00000000\t0\t0\t0",
+        "eth0\t00000000\t010200C0\t0003\t0\t0\t100\t00000000\t0\t0\t0",
+        # Lowest metric, but the route is down (RTF_UP clear)
+        "tun0\t00000000\t01000A0A\t0002\t0\t0\t50\t00000000\t0\t0\t0",
+    ])
+    assert ops.active_interface() == "eth0"
+
+
+def test_linux_active_interface_without_default_route(tmp_path):
+    ops = _linux_ops(tmp_path, ["eth0\t000200C0\t00000000\t0001\t0\t0\t0\t00FFFFFF\t0\t0\t0"])
+    assert ops.active_interface() is None
+
+
+def test_rt_msghdr_matches_darwin_layout():
+    # sizeof(struct rt_msghdr) on macOS, including the 56-byte struct rt_metrics
+    assert nm._RT_MSGHDR.size == 92
+    assert len(nm._SOCKADDR_IN_ANY) == 16
+    assert len(nm._SOCKADDR_DL_EMPTY) == 20
+
+
+def test_rtm_get_default_message():
+    message = nm._pack_rtm_get_default(42)
+    assert len(message) == 92 + 16 + 16 + 20
+    msglen, version, msg_type, index, flags, addrs, pid, seq, msg_errno, use, inits = \
+        nm._RT_MSGHDR.unpack_from(message)
+    assert msglen == len(message)
+    assert (version, msg_type, index) == (5, 0x4, 0)
+    assert flags == nm._RTF_UP | nm._RTF_GATEWAY
+    # RTA_IFP is what makes the kernel fill in rtm_index in its reply
+    assert addrs == nm._RTA_DST | nm._RTA_NETMASK | nm._RTA_IFP
+    assert (pid, seq, msg_errno, use, inits) == (0, 42, 0, 0, 0)
+    # BSD sockaddr_in: sin_len, sin_family, then an all-zero port and address
+    for offset in (92, 108):
+        assert message[offset] == 16
+        assert message[offset + 1] == nm.socket.AF_INET
+        assert message[offset + 2:offset + 16] == bytes(14)
+    # Trailing empty sockaddr_dl: sdl_len=20, sdl_family=AF_LINK, everything else zero
+    assert message[124] == 20
+    assert message[125] == 18
+    assert message[126:144] == bytes(18)
+
+
+class _FakeRouteSocket:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.sent = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def settimeout(self, timeout):
+        pass
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def recv(self, size):
+        reply = self.replies.pop(0)
+        # Replies to our own request are computed from it, like the kernel does
+        return reply(self.sent[-1]) if callable(reply) else reply
+
+
+def _rtm_reply(index, pid, seq=1, msg_type=0x4, msg_errno=0):
+    return nm._RT_MSGHDR.pack(92, 5, msg_type, index, 0, 0, pid, seq, msg_errno, 0, 0) + bytes(32)
+
+
+def _kernel_rtm_get_reply(index):
+    """Answer an RTM_GET the way BSD/XNU do: rtm_index is only filled in if RTA_IFP was requested."""
+    def reply(request):
+        _, _, _, _, _, addrs, _, seq, _, _, _ = nm._RT_MSGHDR.unpack_from(request)
+        return _rtm_reply(index if addrs & nm._RTA_IFP else 0, nm.os.getpid(), seq=seq)
+    return reply
+
+
+def test_pf_route_lookup_skips_unrelated_messages(monkeypatch):
+    pid = nm.os.getpid()
+    fake = _FakeRouteSocket([
+        b"\x00" * 8,                       # truncated message
+        _rtm_reply(3, pid + 1),            # another process's RTM_GET
+        _rtm_reply(3, pid, msg_type=0x1),  # RTM_ADD broadcast
+        _kernel_rtm_get_reply(4),
+    ])
+    monkeypatch.setattr(nm.socket, "socket", lambda *args: fake)
+    monkeypatch.setattr(nm.socket, "if_indextoname", lambda index: f"en{index}")
+    assert nm._read_default_interface_pf_route() == "en4"
+    assert fake.sent == [nm._pack_rtm_get_default(1)]
+
+
+def test_pf_route_lookup_reports_kernel_error(monkeypatch):
+    fake = _FakeRouteSocket([_rtm_reply(0, nm.os.getpid(), msg_errno=nm.errno.EINVAL)])
+    monkeypatch.setattr(nm.socket, "socket", lambda *args: fake)
+    with pytest.raises(OSError):
+        nm._read_default_interface_pf_route()
+
+
+def test_pf_route_lookup_without_default_route(monkeypatch):
+    fake = _FakeRouteSocket([])
+
+    def send(data):
+        raise OSError(nm.errno.ESRCH, "No such process")
+
+    fake.send = send
+    monkeypatch.setattr(nm.socket, "socket", lambda *args: fake)
+    assert nm._read_default_interface_pf_route() is None
+
+
+_ROUTE_GET_DEFAULT = (
+    b"   route to: default\n"
+    b"destination: default\n"
+    b"       mask: default\n"
+    b"    gateway: 192.168.1.1\n"
+    b"  interface: en0\n"
+    b"      flags: <UP,GATEWAY,DONE,STATIC,PRCLONING,GLOBAL>\n"
+)
+
+
+def test_iface_re_extracts_interface():
+    assert nm._IFACE_RE.search(_ROUTE_GET_DEFAULT).group(1) == b"en0"
+
+
+def test_iface_re_without_default_route():
+    assert nm._IFACE_RE.search(b"route: writing to routing socket: not in table\n") is None
+
+
+def test_route_command_fallback_parses_interface(monkeypatch):
+    monkeypatch.setattr(nm, "_spawn_capture", lambda argv: _ROUTE_GET_DEFAULT)
+    assert nm._OsOps().active_interface() == "en0"
+
+
+def test_pf_route_lookup_rejects_missing_interface_index(monkeypatch):
+    fake = _FakeRouteSocket([_rtm_reply(0, nm.os.getpid())])
+    looked_up = []
+    monkeypatch.setattr(nm.socket, "socket", lambda *args: fake)
+    monkeypatch.setattr(nm.socket, "if_indextoname", looked_up.append)
+    with pytest.raises(OSError):
+        nm._read_default_interface_pf_route()
+    assert looked_up == []
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(nm.time, "monotonic", fake)
+    return fake
+
+
+class _FakeOps:
+    def __init__(self, interface="en0", network_name="Wi-Fi", macs=None):
+        self.interface = interface
+        self.network_name = network_name
+        self.macs = {"en0": "aa:bb:cc:dd:ee:00", "en1": "aa:bb:cc:dd:ee:01"} if macs is None else macs
+        self.service_calls = 0
+        self.mac_calls = 0
+
+    def active_interface(self):
+        return self.interface
+
+    def network_service(self, active_interface):
+        self.service_calls += 1
+        if isinstance(self.network_name, Exception):
+            raise self.network_name
+        return {"network_name": self.network_name, "device_name": active_interface}
+
+    def mac(self, device_name):
+        self.mac_calls += 1
+        mac = self.macs.get(device_name)
+        if isinstance(mac, Exception):
+            raise mac
+        return mac
+
+
+@pytest.fixture
+def fake_ops(monkeypatch):
+    ops = _FakeOps()
+    monkeypatch.setattr(nm, "_OS_OPS", ops)
+    monkeypatch.setattr(nm, "_network_info_cache", {})
+    monkeypatch.setattr(nm, "_MAC_CACHE", {})
+    return ops
+
+
+def test_network_info_cached_within_ttl(clock, fake_ops):
+    first = nm.get_active_network_info()
+    clock.now += nm.NETWORK_INFO_TTL - 1
+    assert nm.get_active_network_info() == first
+    assert fake_ops.service_calls == 1
+
+
+def test_network_info_refreshed_after_ttl(clock, fake_ops):
+    nm.get_active_network_info()
+    clock.now += nm.NETWORK_INFO_TTL
+    fake_ops.network_name = "Ethernet"
+    assert nm.get_active_network_info()["network_name"] == "Ethernet"
+    assert fake_ops.service_calls == 2
+
+
+def test_network_info_refreshed_when_interface_changes(clock, fake_ops):
+    nm.get_active_network_info()
+    fake_ops.interface = "en1"
+    info = nm.get_active_network_info()
+    assert info == {"network_name": "Wi-Fi", "device_name": "en1", "mac_address": "aa:bb:cc:dd:ee:01"}
+    assert fake_ops.service_calls == 2
+
+
+def test_network_info_errors_not_cached(clock, fake_ops):
+    fake_ops.network_name = RuntimeError("networksetup failed")
+    assert nm.get_active_network_info()["network_name"] == "Error"
+    fake_ops.network_name = "Wi-Fi"
+    assert nm.get_active_network_info()["network_name"] == "Wi-Fi"
+    assert fake_ops.service_calls == 2
+
+
+@pytest.mark.parametrize("mac", [None, OSError("ifconfig failed")])
+def test_network_info_missing_mac_not_cached(clock, fake_ops, mac):
+    fake_ops.macs["en0"] = mac
+    assert nm.get_active_network_info()["mac_address"] is None
+    fake_ops.macs["en0"] = "aa:bb:cc:dd:ee:00"
+    assert nm.get_active_network_info()["mac_address"] == "aa:bb:cc:dd:ee:00"
+    assert fake_ops.service_calls == 2
+
+
+class _RequestException(Exception):
+    pass
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class _FakeSession:
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return _FakeResponse(answer)
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    def install(*answers):
+        session = _FakeSession(answers)
+        monkeypatch.setattr(nm, "_get_session", lambda: session)
+        return session
+    # get_public_ip() only needs requests for its exception type
+    monkeypatch.setattr(nm, "requests", type("requests", (), {
+        "exceptions": type("exceptions", (), {"RequestException": _RequestException}),
+    }))
+    monkeypatch.setattr(nm, "_public_ip", None)
+    monkeypatch.setattr(nm, "_public_ip_time", 0.0)
+    return install
+
+
+def test_public_ip_cached_within_ttl(clock, fake_session):
+    session = fake_session("203.0.113.1")
+    assert nm.get_public_ip() == "203.0.113.1"
+    clock.now += nm.PUBLIC_IP_TTL - 1
+    assert nm.get_public_ip() == "203.0.113.1"
+    assert session.calls == 1
+
+
+def test_public_ip_refreshed_after_ttl(clock, fake_session):
+    session = fake_session("203.0.113.1", "203.0.113.2")
+    nm.get_public_ip()
+    clock.now += nm.PUBLIC_IP_TTL
+    assert nm.get_public_ip() == "203.0.113.2"
+    assert session.calls == 2
+
+
+def test_public_ip_errors_not_cached(clock, fake_session):
+    session = fake_session(_RequestException("timed out"), "203.0.113.1")
+    assert nm.get_public_ip() == "Unable to get IP"
+    assert nm.get_public_ip() == "203.0.113.1"
+    assert session.calls == 2
+
+
+@pytest.fixture
+def fake_dns(monkeypatch):
+    answers = []
+    lookups = []
+
+    def gethostbyname(host):
+        lookups.append(host)
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(nm.socket, "gethostbyname", gethostbyname)
+    monkeypatch.setattr(nm, "_dns_cache", {})
+    return answers, lookups
+
+
+def test_resolve_cached_within_ttl(clock, fake_dns):
+    answers, lookups = fake_dns
+    answers.append("142.250.74.46")
+    assert nm._resolve("google.com") == "142.250.74.46"
+    clock.now += nm.DNS_CACHE_TTL - 1
+    assert nm._resolve("google.com") == "142.250.74.46"
+    assert lookups == ["google.com"]
+
+
+def test_resolve_refreshed_after_ttl(clock, fake_dns):
+    answers, lookups = fake_dns
+    answers.extend(["142.250.74.46", "142.250.74.78"])
+    nm._resolve("google.com")
+    clock.now += nm.DNS_CACHE_TTL
+    assert nm._resolve("google.com") == "142.250.74.78"
+    assert len(lookups) == 2
+
+
+def test_resolve_reuses_stale_address_when_refresh_fails(clock, fake_dns):
+    answers, lookups = fake_dns
+    answers.extend(["142.250.74.46", nm.socket.gaierror("temporary failure"), "142.250.74.78"])
+    nm._resolve("google.com")
+    clock.now += nm.DNS_CACHE_TTL
+    assert nm._resolve("google.com") == "142.250.74.46"
+    # The failure is not cached; the next call tries the resolver again
+    assert nm._resolve("google.com") == "142.250.74.78"
+    assert len(lookups) == 3
+
+
+def test_resolve_raises_without_cached_address(clock, fake_dns):
+    answers, _ = fake_dns
+    answers.append(nm.socket.gaierror("Name or service not known"))
+    with pytest.raises(OSError):
+        nm._resolve("google.com")
+
+
+def _log_record(message, created, levelno=nm.logging.INFO):
+    record = nm.logging.LogRecord("test", levelno, __file__, 0, message, None, None)
+    record.created = created
+    return record
+
+
+@pytest.fixture
+def buffered_log(tmp_path):
+    path = tmp_path / "monitor.log"
+    handler = nm.BufferedFileHandler(str(path), flush_records=3, flush_interval=60, encoding="utf-8", delay=True)
+    handler._last_flush = 1000.0
+    yield handler, path
+    handler.close()
+
+
+def _written(path):
+    return path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+
+
+def test_buffered_log_flushes_every_n_records(buffered_log):
+    handler, path = buffered_log
+    handler.handle(_log_record("a", 1001.0))
+    handler.handle(_log_record("b", 1002.0))
+    assert _written(path) == []
+    handler.handle(_log_record("c", 1003.0))
+    assert _written(path) == ["a", "b", "c"]
+    handler.handle(_log_record("d", 1004.0))
+    assert _written(path) == ["a", "b", "c"]
+
+
+def test_buffered_log_flushes_after_interval(buffered_log):
+    handler, path = buffered_log
+    handler.handle(_log_record("a", 1059.0))
+    assert _written(path) == []
+    handler.handle(_log_record("b", 1060.0))
+    assert _written(path) == ["a", "b"]
+    # The interval restarts from the last flush
+    handler.handle(_log_record("c", 1119.0))
+    assert _written(path) == ["a", "b"]
+
+
+@pytest.mark.parametrize("levelno", [nm.logging.WARNING, nm.logging.ERROR])
+def test_buffered_log_flushes_warnings_immediately(buffered_log, levelno):
+    handler, path = buffered_log
+    handler.handle(_log_record("a", 1001.0))
+    handler.handle(_log_record("overrun", 1002.0, levelno))
+    assert _written(path) == ["a", "overrun"]
+
+
+def test_buffered_log_flushes_on_close(buffered_log):
+    handler, path = buffered_log
+    handler.handle(_log_record("a", 1001.0))
+    handler.close()
+    assert _written(path) == ["a"]